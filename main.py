@@ -16,20 +16,70 @@ filepath. If this file doesn't exist, it is made.
         None
 
     Parameters:
-        time_difference (int): Time in seconds between measurements
-
         fancy_print_character (char): Single character that's used for
                                       the fancy_print function
 
-        opc_config (dict): Config options parsed from OPCSettings.json
-                          Contains the following keys:
-                            "Name" (str): Name of the Sensor
-                            "Port" (str): Path to the SPI interface
-                            "Use Bin Data" (boolean): Save bin data
-                                                      to spreadsheet?
-                            "Fan Speed" (int): Digital pot setting
-                                               for fan (currently
-                                               unused)
+        fancy_printer (FancyPrinter): Prints console output with
+                                      fancy_print_character
+
+        _stdout_write (function): sys.stdout.write, used for the status
+                                  line in the measurement loop
+
+        _stdout_flush (function): sys.stdout.flush
+
+        _STATUS_MEASURING (str): Status line shown while the OPC is
+                                 measuring, padded to overwrite the
+                                 previous status line
+
+        _STATUS_STORING (str): Status line shown while the measurement
+                               is stored, padded to overwrite the
+                               previous status line
+
+        _STOP (Condition): Notified when SIGINT or SIGTERM is received
+                           to stop the measurement loop. It uses an
+                           RLock so the signal handler can't deadlock
+                           on a lock the main thread already holds
+
+        _stop_requested (bool): Set under _STOP when SIGINT or SIGTERM
+                                is received
+
+        _USER (str): Username of the account running the script,
+                     called once via getpass.getuser()
+
+        _CSV_FLAGS (int): Flags passed to os.open when opening the daily
+                          csv files for appending
+
+        _FSYNC_INTERVAL (int): Maximum number of seconds between syncing
+                               the daily csv file to disk
+
+        _BIN_NONES (str): 24 comma delimited None values, written to
+                          the bin columns when bin data is missing
+
+        _BIN_NONES_BYTES (bytes): _BIN_NONES encoded with the leading
+                                  separator, as appended by CsvSink
+
+        _INTERVALS (MappingProxyType): Read only mapping of the number
+                                       of minutes between each of the
+                                       measurement intervals that can
+                                       be set in OPCSettings.json
+
+        opc_settings (dict): Config options parsed from
+                             OPCSettings.json
+                             Contains the following keys:
+                               "Name" (str): Name of the Sensor
+                               "Port" (str): Path to the SPI interface
+                               "Measurement Time" (str): Interval
+                                                         between
+                                                         measurements
+                               "Use Bin Data" (boolean): Save bin data
+                                                         to
+                                                         spreadsheet?
+                               "Fan Speed" (int): Digital pot setting
+                                                  for fan (currently
+                                                  unused)
+                               "File Path" (str): Path to save data to
+
+        opc_config (OpcConfig): opc_settings parsed in to an OpcConfig
 
         serial_config (dict): Config options for serial device. Should
                              not need altering for the OPC-N3
@@ -40,18 +90,50 @@ filepath. If this file doesn't exist, it is made.
         firstMeasurementTime (datetime): When the first measurement
                                          will take place
 
-        start_time (float): When the measurement starts, expressed in
-                           seconds since epoch and calculated with
-                           time.time()
+        start_time (datetime): When the measurement starts. Used as
+                               the timestamp of the measurement and to
+                               calculate when the next one is
+
+        end_time (datetime): When the measurement was stored. If the
+                             next measurement is already due by then,
+                             it is skipped and the one after is used
+
+        csv_sink (CsvSink): Saves measurements to the daily csv file
+
+        is_tty (boolean): True if stdout is a terminal. The measuring
+                          and storing status lines are only written
+                          to a terminal
+
+        status_end (str): Ends the status line after each measurement.
+                          A carriage return on a terminal so it is
+                          overwritten, a new line otherwise
+
+        stopped (boolean): True once SIGINT or SIGTERM has been
+                           received and the measurement loop should
+                           stop
+
+    Classes:
+        OpcConfig: Config options parsed from OPCSettings.json
+
+        FancyPrinter: fancy_print with the formatting worked out once
+                      for a given length and char
+
+        CsvSink: Saves recorded data to OPC Data directory, creating a
+                 file with appropriate headers if one doesn't exist.
+                 The file is kept open until the date changes
 
     Functions:
+        main: Records measurements made by the OPC-N3 until SIGINT or
+              SIGTERM is received
+
         fancy_print: Makes string output to console look nicer
 
         find_valid_path: Finds and returns a valid path to save data to
 
-        save_to_file: Saved recorded data to OPC Data directory,
-                      creating a file with appropriate headers if one
-                      doesn't exist
+        _wait_until: Waits until the next measurement time or until
+                     the measurement loop is stopped
+
+        _request_stop: Signal handler that stops the measurement loop
 
         bin_Nones: One line function to return blank measurements for
                    the bin values
@@ -68,26 +150,160 @@ __maintainer__ = "Idris Hayward"
 __email__ = "CaderIdrisGH@outlook.com"
 __status__ = "Stable Release"
 
+import atexit
+import dataclasses
 import datetime as dt
 import json
 import time
 import os
 import getpass
+import itertools
+import signal
+import sys
+import threading
+from types import MappingProxyType
 import warnings
 
 import serial
 
 from peripherals.OPCN3 import OPCN3 as OPC
+from peripherals.OPCN3 import OPCTimeoutError
 
 fancy_print_character = "\U0001F533"
 
+# Status line output in the measurement loop
+_stdout_write = sys.stdout.write
+_stdout_flush = sys.stdout.flush
+_STATUS_MEASURING = "Measuring data".ljust(70) + "\r"
+_STATUS_STORING = "Storing Data".ljust(70) + "\r"
+
+# Notified by _request_stop to stop the measurement loop. The signal
+# handler runs in the main thread, possibly while it holds the lock,
+# so it has to be reentrant. threading.Event uses a plain Lock
+_STOP = threading.Condition(threading.RLock())
+_stop_requested = False
+
+# Username of the account running the script, used by find_valid_path
+_USER = getpass.getuser()
+
+# Flags used to open the daily csv files for appending
+_CSV_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CLOEXEC
+
+# Maximum number of seconds between syncing the daily csv file to disk
+_FSYNC_INTERVAL = 30
+
+# Blank measurements for the bin columns, see bin_Nones
+_BIN_NONES = ", ".join(("None",) * 24)
+_BIN_NONES_BYTES = f", {_BIN_NONES}".encode()
+
+# The number of minutes between set time intervals. Read only as it is
+# shared by first_measurement_time and next_measurement_time
+_INTERVALS = MappingProxyType(
+    {
+        "1m": 1,
+        "5m": 5,
+        "10m": 10,
+        "15m": 15,
+        "30m": 30,
+        "1h": 60,
+    }
+)
+
+
+class FancyPrinter:
+    """Makes strings output to the console look nicer
+
+    The formatting used by fancy_print is worked out once when the
+    class is initialised, rather than every time a string is printed.
+
+        Attributes:
+            _line (str): Line of 'char's 'length' long
+
+            _padWidth (int): Width that strings are padded to
+
+            _char (str): The character printed at each end
+
+            _normTemplate (str): Format string used by norm
+
+        Methods:
+            title: Centers a string and puts one char at each end
+
+            norm: Left justifies a string and puts one char at each
+                  end
+
+            line: Prints a line of 'char's 'length' long
+    """
+
+    def __init__(self, length=70, char="#"):
+        """Initialises the class
+
+        Keyword Arguments:
+            length (int): Total length of formatted string
+
+            char (str): The character to print. Only the first
+                        character is used
+
+        Variables:
+            length_adjust (float): Slope used to adjust length of line.
+            Used if an emoji is used for 'char' as they take up twice
+            as much space. If one is detected, the length is adjusted.
+
+            length_offset (int): Offset used to adjust length of line.
+            Used if an emoji is used for 'char' as they take up twice
+            as much space. If one is detected, the length is adjusted.
+        """
+        length_adjust = 1
+        length_offset = 0
+        if len(char) > 1:
+            char = char[0]
+        if len(char.encode("utf-8")) > 1:
+            length_adjust = 0.5
+            length_offset = 1
+        self._line = char * int(((length) * length_adjust) + length_offset)
+        self._padWidth = length - 4
+        self._char = char
+        self._normTemplate = f"{char} {{:<{self._padWidth}}} {char}"
+
+    def title(self, str_to_print):
+        """Prints 'str_to_print' centered with one char at each end
+
+        Keyword Arguments:
+            str_to_print (str): The string to be formatted and printed
+        """
+        print(
+            f"{self._char} {str_to_print.center(self._padWidth, ' ')} "
+            f"{self._char}"
+        )
+
+    def norm(self, str_to_print):
+        """Prints 'str_to_print' left justified with one char at each
+        end
+
+        Keyword Arguments:
+            str_to_print (str): The string to be formatted and printed
+        """
+        print(self._normTemplate.format(str_to_print))
+
+    def line(self):
+        """Prints a line of 'char's 'length' long
+
+        Keyword Arguments:
+            None
+        """
+        print(self._line)
+
+
+fancy_printer = FancyPrinter(70, fancy_print_character)
+
 
 def fancy_print(str_to_print, length=70, form="NORM", char="#"):
     """Makes strings output to the console look nicer
 
     This function is used to make the console output of python
     scripts look nicer. This function is used in a range of
-    modules to save time in formatting console output.
+    modules to save time in formatting console output. Code that
+    prints repeatedly with the same length and char should use a
+    FancyPrinter instead, such as fancy_printer.
 
         Keyword arguments:
             str_to_print (str): The string to be formatted and printed
@@ -105,32 +321,17 @@ def fancy_print(str_to_print, length=70, form="NORM", char="#"):
 
             char (str): The character to print.
 
-        Variables:
-            length_slope (float): Slope used to adjust length of line.
-            Used if an emoji is used for 'char' as they take up twice
-            as much space. If one is detected, the length is adjusted.
-
-            length_offset (int): Offset used to adjust length of line.
-            Used if an emoji is used for 'char' as they take up twice
-            as much space. If one is detected, the length is adjusted.
-
         Returns:
             Nothing, prints a 'form' formatted 'str_to_print' of
             length 'length'
     """
-    length_adjust = 1
-    length_offset = 0
-    if len(char) > 1:
-        char = char[0]
-    if len(char.encode("utf-8")) > 1:
-        length_adjust = 0.5
-        length_offset = 1
+    printer = FancyPrinter(length, char)
     if form == "TITLE":
-        print(f"{char} {str_to_print.center(length - 4, ' ')} {char}")
+        printer.title(str_to_print)
     elif form == "LINE":
-        print(char * int(((length) * length_adjust) + length_offset))
+        printer.line()
     else:
-        print(f"{char} {str_to_print.ljust(length - 4, ' ')} {char}")
+        printer.norm(str_to_print)
 
 
 def find_valid_path():
@@ -155,13 +356,13 @@ def find_valid_path():
             None
 
         Variables:
-            media_dirs (list): List of tuples containing info on the
-                               directories located in /media/"usr"/
-                               where usr is the current accounts
-                               username, called via getpass.getuser()
+            search_dir (str): The directory being searched, either
+                              /media/"usr"/ where usr is the current
+                              accounts username (_USER) or /mnt/
 
-            mnt_dirs (list): List of tuples containing info on the
-                             directories located in /mnt/
+            found_dirs (list): Paths to the directories located in
+                               search_dir, at most two as _find_dirs
+                               stops scanning after the second
 
         Returns:
             IF 1 directory present in media, it returns the path to
@@ -172,51 +373,44 @@ def find_valid_path():
             calculated via the relative path by os.path.expanduser()
             The OPCData directory is added to these paths
     """
-    try:
-        media_dirs = [
-            f.path
-            for f in os.scandir(f"/media/{getpass.getuser()}/")
-            if f.is_dir()
-        ]
-        if len(media_dirs) == 1:
-            return f"{media_dirs[0]}/OPC Data/"
-        elif len(media_dirs) > 1:
-            fancy_print(
-                f"{len(media_dirs)} external devices found in "
-                f"/media/{getpass.getuser()}/. Unmount "
-                f"{len(media_dirs) - 1} devices or give file path",
-                char=fancy_print_character,
+    for search_dir in (f"/media/{_USER}/", "/mnt/"):
+        found_dirs = _find_dirs(search_dir)
+        if len(found_dirs) == 1:
+            return f"{found_dirs[0]}/OPC Data/"
+        elif len(found_dirs) > 1:
+            fancy_printer.norm(
+                f"More than one external device found in {search_dir}. "
+                "Unmount all but one or give file path"
             )
         else:
-            fancy_print(
-                f"No external devices found in /media/"
-                f"{getpass.getuser()}/",
-                char=fancy_print_character,
-            )
-    except FileNotFoundError:
-        fancy_print(
-            f"No external devices found in /media/{getpass.getuser()}/",
-            char=fancy_print_character,
-        )
+            fancy_printer.norm(f"No external devices found in {search_dir}")
+    return os.path.expanduser("~/Documents/OPC Data/")
+
+
+def _find_dirs(search_dir):
+    """Returns the paths to the directories located in 'search_dir'
+
+    os.scandir is used as it can usually tell whether an entry is a
+    directory without an extra stat call. The scan stops once a second
+    directory is found, as find_valid_path only needs to know whether
+    there is exactly one.
+
+        Keyword Arguments:
+            search_dir (str): The directory to search
+
+        Returns:
+            List of paths to the first two directories in 'search_dir'.
+            Empty if 'search_dir' doesn't exist
+    """
     try:
-        mnt_dirs = [f.path for f in os.scandir("/mnt") if f.is_dir()]
-        if len(mnt_dirs) == 1:
-            return f"{mnt_dirs[0]}/OPC Data/"
-        elif len(mnt_dirs) > 1:
-            fancy_print(
-                f"{len(mnt_dirs)} found in /mnt/."
-                f" Unmount {len(mnt_dirs) - 1} devices or give file path",
-                char=fancy_print_character,
-            )
-        else:
-            fancy_print(
-                f"No external devices found in /mnt/", char=fancy_print_character
+        with os.scandir(search_dir) as entries:
+            return list(
+                itertools.islice(
+                    (entry.path for entry in entries if entry.is_dir()), 2
+                )
             )
     except FileNotFoundError:
-        fancy_print(
-            f"No external devices found in /mnt/", char=fancy_print_character
-        )
-    return os.path.expanduser("~/Documents/OPC Data/")
+        return []
 
 
 def first_measurement_time(timeInterval, currentTime):
@@ -237,49 +431,36 @@ def first_measurement_time(timeInterval, currentTime):
                                     place
 
         Parameters:
-            validMinutes (list of int): The minutes that measurements
-                                        will be made on
+            step (int): The number of minutes between measurements
 
             currentMinute (int): The minute the program was initialised
                                  on
 
             nextMinute (int): The first minute a measurement will occur
 
+            addHours (int): 1 if the first measurement rolls over in to
+                            the next hour, 0 if not
+
             nextMeasurement (datetime): When the first measurement will
                                         occur
 
         Returns:
             nextMeasurement
     """
-    setIntervals = {
-        "1m": 1,
-        "5m": 5,
-        "10m": 10,
-        "15m": 15,
-        "30m": 30,
-        "1h": 60,
-    }
-    if timeInterval not in list(setIntervals.keys()):
+    if timeInterval not in _INTERVALS:
         warnings.warn(
             "Specified time interval not expected, defaulting to" " 1m"
         )
         timeInterval = "1m"
-    validMinutes = list(range(0, 60, setIntervals[timeInterval]))
-
-    currentMinute = int(currentTime.strftime("%M"))
-    nextMinute = 60
-    for index, minute in enumerate(validMinutes[1:]):
-        if minute > currentMinute:
-            nextMinute = minute
-            break
-    if nextMinute < 60:
-        nextMeasurement = currentTime.replace(
-            minute=nextMinute, second=0, microsecond=0
-        )
-    else:
-        nextMeasurement = currentTime.replace(
-            minute=0, second=0, microsecond=0
-        ) + dt.timedelta(hours=1)
+    step = _INTERVALS[timeInterval]
+    currentMinute = currentTime.minute
+    # The next minute that is a multiple of step, rolling over in to
+    # the next hour if it's 60 or more
+    nextMinute = ((currentMinute // step) + 1) * step
+    addHours, nextMinute = divmod(nextMinute, 60)
+    nextMeasurement = currentTime.replace(
+        minute=nextMinute, second=0, microsecond=0
+    ) + dt.timedelta(hours=addHours)
     return nextMeasurement
 
 
@@ -296,32 +477,78 @@ def next_measurement_time(timeInterval, currentTime):
                                 place
 
     Parameters:
-        setIntervals (dict): The number of minutes between set time
-                             intervals. This should be moved to a
-                             json later on for easier customisation
-
         nextTime (datetime): When the next measurement will take
                              place
 
     Returns:
         nextTime with second and microsecond set to 0
     """
-    setIntervals = {
-        "1m": 1,
-        "5m": 5,
-        "10m": 10,
-        "15m": 15,
-        "30m": 30,
-        "1h": 60,
-    }
-    if timeInterval not in list(setIntervals.keys()):
+    if timeInterval not in _INTERVALS:
         timeInterval = "1m"
-    nextTime = currentTime + dt.timedelta(minutes=setIntervals[timeInterval])
+    nextTime = currentTime + dt.timedelta(minutes=_INTERVALS[timeInterval])
     return nextTime.replace(second=0, microsecond=0)
 
 
-def save_to_file(opcData, timestamp, filePath):
-    """Saved recorded data to OPC Data directory, creating a file with
+@dataclasses.dataclass(frozen=True)
+class OpcConfig:
+    """Config options parsed from OPCSettings.json
+
+    Parsing the settings in to a dataclass means a missing key is
+    caught when the program starts, rather than part way through
+    recording measurements.
+
+        Attributes:
+            name (str): Name of the Sensor
+
+            port (str): Path to the SPI interface
+
+            measurement_time (str): Interval between measurements,
+                                    one of the keys in _INTERVALS
+
+            use_bin_data (boolean): Save bin data to spreadsheet?
+
+            fan_speed (int): Digital pot setting for fan (currently
+                             unused)
+
+            file_path (str): Path to save data to. Empty if a path
+                             should be found with find_valid_path
+
+        Methods:
+            from_settings: Parses the settings loaded from
+                           OPCSettings.json
+    """
+
+    name: str
+    port: str
+    measurement_time: str
+    use_bin_data: bool
+    fan_speed: int
+    file_path: str
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Parses the settings loaded from OPCSettings.json
+
+        Keyword Arguments:
+            settings (dict): Config options loaded from
+                             OPCSettings.json
+
+        Returns:
+            OpcConfig containing the settings. Raises KeyError if a
+            setting is missing
+        """
+        return cls(
+            name=settings["Name"],
+            port=settings["Port"],
+            measurement_time=settings["Measurement Time"],
+            use_bin_data=settings["Use Bin Data"],
+            fan_speed=settings["Fan Speed"],
+            file_path=settings["File Path"],
+        )
+
+
+class CsvSink:
+    """Saves recorded data to OPC Data directory, creating a file with
     appropriate headers if one doesn't exist
 
     The formatted data measured by the OPC is saved to a csv file.
@@ -335,6 +562,55 @@ def save_to_file(opcData, timestamp, filePath):
     present then bin data headers are added, otherwise the file does
     not expect bin data.
 
+    The daily csv file is only opened when the date changes, rather
+    than for every measurement. Whether the file expects bin data is
+    read from the headers once when the file is opened and cached for
+    the rest of the day. The file is opened with O_APPEND and each
+    measurement is written with a single os.write call, so every line
+    reaches the OS as soon as it is measured without any seeking. The
+    file is synced to disk at most every _FSYNC_INTERVAL seconds, and
+    when it is closed, so little is lost if the Pi loses power.
+
+        Attributes:
+            filePath (str): Path to save the files to
+
+            _fd (int): File descriptor of the csv file that data is
+                       being appended to. None if no file is open
+
+            _date (date): Date of the file currently open
+
+            _bin_expected (boolean): Are there headers containing the
+                                     phrase "Bin" present in the file
+                                     headers?
+
+            _lastSync (float): time.monotonic() value when the file was
+                               last synced to disk
+
+            _row (bytearray): Reused to build each line appended to the
+                              csv file
+
+        Methods:
+            write: Appends a measurement to the daily csv file
+
+            close: Syncs and closes the daily csv file
+    """
+
+    def __init__(self, filePath):
+        """Initialises the class
+
+        Keyword Arguments:
+            filePath (str): Path to save the files to
+        """
+        self.filePath = filePath
+        self._fd = None
+        self._date = None
+        self._bin_expected = False
+        self._lastSync = float("-inf")
+        self._row = bytearray()
+
+    def write(self, opcData, timestamp):
+        """Appends a measurement to the daily csv file
+
         Keyword Arguments:
             opcData (dict): Measurements made by the OPC formatted by
                             the formatData method. Contains 4 keys,
@@ -344,62 +620,128 @@ def save_to_file(opcData, timestamp, filePath):
 
             timestamp (datetime): The time the measurement was made
 
-            filePath (str): Path to save the file to
-
         Variables:
-            fileName (str): What file to save it to, determined by the
-                            measurement date (YYYY-MM-DD)
+            measurementTime (str): When the measurement was made,
+                                   second resolution
+                                   (YYYY-MM-DD HH:MM:SS)
+
+            measurementDate (date): The date the measurement was made,
+                                    used to check whether a new file
+                                    needs to be opened
+
+            binDataPresent (boolean): Is there bin data present in the
+                                      formatted measurements made by
+                                      the OPC?
+
+            row (bytearray): The line appended to the csv file, built
+                             in to _row
+        """
+        measurementTime = timestamp.isoformat(sep=" ", timespec="seconds")
+        measurementDate = timestamp.date()
+        if measurementDate != self._date:
+            self.close()
+            if not self._open(opcData, measurementDate, measurementTime):
+                # New file has been created with the first
+                # measurement, or there was nothing to write to it
+                return
+        binDataPresent = opcData["Bin Headers"] is not None
+        row = self._row
+        row.clear()
+        row += measurementTime.encode()
+        row += b", "
+        # Data is None if the OPC didn't return a measurement, which is
+        # logged as a None row
+        row += str(opcData["Data"]).encode()
+        if self._bin_expected and binDataPresent:
+            # If there's bin headers and bin data, go for it!
+            row += b", "
+            row += opcData["Bin Data"].encode()
+        elif self._bin_expected:
+            # If there's bin headers and no bin data, log None
+            row += _BIN_NONES_BYTES
+        # If there's bin data but no bin headers, or no bin data and no
+        # bin headers, don't log it
+        row += b"\n"
+        os.write(self._fd, row)
+        self._sync()
+
+    def _open(self, opcData, measurementDate, measurementTime):
+        """Opens the csv file for 'measurementDate' in append mode
+
+        If the file already exists, the headers are read once to check
+        whether bin data is expected. If it doesn't, the file is
+        created with the appropriate headers and the first measurement
+        and whether bin data is expected is taken from the first
+        measurement. An empty file, such as one left behind if power
+        was lost as it was created, is treated as a new file so it
+        still gets headers. The file is created with O_EXCL so if
+        another process creates it first, it is opened as an existing
+        file instead.
+
+        Keyword Arguments:
+            opcData (dict): Measurements made by the OPC formatted by
+                            the formatData method
+
+            measurementDate (date): The date the measurement was made
 
             measurementTime (str): When the measurement was made,
                                    second resolution
                                    (YYYY-MM-DD HH:MM:SS)
 
-            fileHeaders (str): Headers already present in file if file
-                               is present or headers to be added to
-                               file if it is being created
+        Variables:
+            fileName (str): What file to save it to, determined by the
+                            measurement date (YYYY-MM-DD)
 
+            fileExists (boolean): Does the file already exist?
 
-            csvFile (File): Object representing the csv file that data
-                            if being appended to
+            createFlags (int): Flags used to create the file
 
-            binHeadersPresent (boolean): Are there headers containing
-                                         the phrase "Bin" present in
-                                         the file headers?
+        Returns:
+            True if an existing file was opened and the measurement
+            still needs to be written, False if not
+        """
+        fileName = f"{self.filePath}{measurementDate.isoformat()}.csv"
+        fileExists = os.path.exists(fileName)
+        if fileExists and os.path.getsize(fileName) > 0:
+            self._open_existing(fileName, measurementDate)
+            return True
+        if opcData["Headers"] is None:
+            # Nothing was measured, so there are no headers to create
+            # the file with
+            return False
+        os.makedirs(self.filePath, exist_ok=True)
+        createFlags = _CSV_FLAGS | os.O_CREAT
+        if not fileExists:
+            createFlags |= os.O_EXCL
+        try:
+            self._fd = os.open(fileName, createFlags, 0o644)
+        except FileExistsError:
+            self._open_existing(fileName, measurementDate)
+            return True
+        self._write_header_and_first_record(opcData, measurementTime)
+        self._bin_expected = opcData["Bin Headers"] is not None
+        self._date = measurementDate
+        self._sync()
+        return False
+
+    def _write_header_and_first_record(self, opcData, measurementTime):
+        """Writes the headers and first measurement to a new csv file
+        in a single write
 
-            binDataPresent (boolean): Is there bin data present in the
-                                      formatted measurements made by
-                                      the OPC?
+        Keyword Arguments:
+            opcData (dict): Measurements made by the OPC formatted by
+                            the formatData method
+
+            measurementTime (str): When the measurement was made,
+                                   second resolution
+                                   (YYYY-MM-DD HH:MM:SS)
+
+        Variables:
+            fileHeaders (str): Headers to be added to the file
 
             firstMeasurements (str): The first measurements to be
                                      appended to the csv file
-    """
-    fileName = f'{filePath}{timestamp.strftime("%Y-%m-%d")}.csv'
-    measurementTime = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        with open(fileName, "r+") as csvFile:
-            fileHeaders = csvFile.readline()
-            binHeadersPresent = "Bin" in fileHeaders
-            binDataPresent = opcData["Bin Headers"] is not None
-            csvFile.read()
-            if binHeadersPresent and binDataPresent:
-                # If there's bin headers and bin data, go for it!
-                csvFile.write(
-                    f'{measurementTime}, {opcData["Data"]}, '
-                    f'{opcData["Bin Data"]}\n'
-                )
-            elif binHeadersPresent:
-                # If there's bin headers and no bin data, log None
-                csvFile.write(
-                    f'{measurementTime}, {opcData["Data"]}, '
-                    f"{bin_Nones()}\n"
-                )
-            else:
-                # If there's bin data but no bin headers, or no bin
-                # data and no bin headers, don't log it
-                csvFile.write(f'{measurementTime}, {opcData["Data"]}\n')
-    except FileNotFoundError:
-        fileHeaders = None
-        firstMeasurements = None
+        """
         if opcData["Bin Headers"] is not None:
             fileHeaders = (
                 f'Timestamp, {opcData["Headers"]}, '
@@ -409,15 +751,99 @@ def save_to_file(opcData, timestamp, filePath):
                 f'{measurementTime}, {opcData["Data"]}, '
                 f'{opcData["Bin Data"]}'
             )
-        elif opcData["Headers"] is not None:
+        else:
             fileHeaders = f'Timestamp, {opcData["Headers"]}'
             firstMeasurements = f'{measurementTime}, {opcData["Data"]}'
-        if not os.path.isdir(filePath):
-            os.makedirs(filePath)
-        if (fileHeaders and firstMeasurements) is not None:
-            with open(fileName, "w") as csvFile:
-                csvFile.write(f"{fileHeaders}\n")
-                csvFile.write(f"{firstMeasurements}\n")
+        os.write(self._fd, f"{fileHeaders}\n{firstMeasurements}\n".encode())
+
+    def _open_existing(self, fileName, measurementDate):
+        """Opens an existing csv file, reading the headers once to check
+        whether bin data is expected
+
+        Keyword Arguments:
+            fileName (str): Path to the csv file
+
+            measurementDate (date): The date the file is for
+
+        Variables:
+            fileHeaders (str): Headers already present in file
+        """
+        with open(fileName, "r") as csvFile:
+            fileHeaders = csvFile.readline()
+        self._bin_expected = "Bin" in fileHeaders
+        self._fd = os.open(fileName, _CSV_FLAGS)
+        self._date = measurementDate
+
+    def _sync(self):
+        """Syncs the csv file to disk if it hasn't been synced in the
+        last _FSYNC_INTERVAL seconds
+
+        Keyword Arguments:
+            None
+        """
+        if time.monotonic() - self._lastSync >= _FSYNC_INTERVAL:
+            os.fsync(self._fd)
+            self._lastSync = time.monotonic()
+
+    def close(self):
+        """Syncs and closes the daily csv file
+
+        Keyword Arguments:
+            None
+        """
+        if self._fd is not None:
+            os.fsync(self._fd)
+            os.close(self._fd)
+        self._fd = None
+        self._date = None
+
+
+def _wait_until(wakeTime):
+    """Waits until 'wakeTime' or until the measurement loop is stopped
+
+    The time to wait is worked out from the full timedelta, including
+    microseconds, so no second needs to be added on to avoid waking
+    on the 59th second of the previous minute. Only from Python 3.11
+    does _STOP.wait_for time out against the monotonic clock. On older
+    versions the lock wait behind it is timed against the system
+    clock, so stepping the clock while waiting can move the wake up.
+    If 'wakeTime' has already passed, it returns straight away.
+
+        Keyword Arguments:
+            wakeTime (datetime): When to stop waiting
+
+        Variables:
+            timeToWake (float): Seconds until 'wakeTime'. The
+                                total_seconds method includes the days
+                                component, so this is negative rather
+                                than almost a day if 'wakeTime' has
+                                passed
+
+        Returns:
+            True if the measurement loop was stopped while waiting,
+            False if 'wakeTime' was reached
+    """
+    timeToWake = (wakeTime - dt.datetime.now()).total_seconds()
+    with _STOP:
+        return _STOP.wait_for(lambda: _stop_requested, max(0.0, timeToWake))
+
+
+def _request_stop(signum, frame):
+    """Signal handler that stops the measurement loop
+
+    The loop waits on _STOP between measurements, so notifying it ends
+    the wait straight away. A measurement that is being made when the
+    signal arrives is finished and stored first.
+
+        Keyword Arguments:
+            signum (int): The signal number
+
+            frame (frame): The stack frame interrupted by the signal
+    """
+    global _stop_requested
+    with _STOP:
+        _stop_requested = True
+        _STOP.notify_all()
 
 
 def bin_Nones():
@@ -430,27 +856,40 @@ def bin_Nones():
         Returns:
             24 comma delimited None values for csv file
     """
-    return ("None, " * 23) + "None"
+    return _BIN_NONES
 
 
-if __name__ == "__main__":
+def main():
+    """Records measurements made by the OPC-N3 to the daily csv files
+
+    Prints the program information, loads OPCSettings.json, connects
+    to and tests the OPC-N3, then makes measurements at the interval
+    set in OPCSettings.json until SIGINT or SIGTERM is received. The
+    parameters listed in the module docstring are local to this
+    function.
+
+        Keyword Arguments:
+            None
+    """
     # PROGRAM INIT
-    fancy_print("", form="LINE", char=fancy_print_character)
-    fancy_print(
-        "GCARE OPC-N3 Python Script", form="TITLE", char=fancy_print_character
-    )
-    fancy_print(f"Author:  {__author__}", char=fancy_print_character)
-    fancy_print(f"Contact: {__email__}", char=fancy_print_character)
-    fancy_print(f"Version: {__version__}", char=fancy_print_character)
-    fancy_print(f"Status:  {__status__}", char=fancy_print_character)
-    fancy_print(f"License: {__license__}", char=fancy_print_character)
-    fancy_print("", form="LINE", char=fancy_print_character)
+    # The banner is only useful to someone watching a terminal. It's
+    # skipped when output goes to a log and compiled out by python -O
+    if __debug__ and sys.stdout.isatty():
+        fancy_printer.line()
+        fancy_printer.title("GCARE OPC-N3 Python Script")
+        fancy_printer.norm(f"Author:  {__author__}")
+        fancy_printer.norm(f"Contact: {__email__}")
+        fancy_printer.norm(f"Version: {__version__}")
+        fancy_printer.norm(f"Status:  {__status__}")
+        fancy_printer.norm(f"License: {__license__}")
+    fancy_printer.line()
 
     # LOAD OPC SETTINGS
     with open("OPCSettings.json", "r") as opc_config_json:
-        opc_config = json.load(opc_config_json)
+        opc_settings = json.load(opc_config_json)
+    opc_config = OpcConfig.from_settings(opc_settings)
     serial_config = {
-        "port": opc_config["Port"],
+        "port": opc_config.port,
         "baudrate": 9600,
         "parity": serial.PARITY_NONE,
         "bytesize": serial.EIGHTBITS,
@@ -458,88 +897,103 @@ if __name__ == "__main__":
         "xonxoff": False,
         "timeout": 1,
     }
-    time_difference = opc_config["Measurement Time"]
-    if opc_config["File Path"] == "":
-        opc_config["File Path"] = find_valid_path()
-    if not os.path.isdir(opc_config["File Path"]):
-        os.makedirs(opc_config["File Path"])
-    fancy_print(
-        f'- Saving data to{opc_config["File Path"]}', char=fancy_print_character
-    )
-    fancy_print("", form="LINE", char=fancy_print_character)
-    fancy_print("Connecting to OPC-N3", char=fancy_print_character)
+    if opc_config.file_path == "":
+        opc_config = dataclasses.replace(
+            opc_config, file_path=find_valid_path()
+        )
+    if not os.path.isdir(opc_config.file_path):
+        os.makedirs(opc_config.file_path)
+    fancy_printer.norm(f"- Saving data to{opc_config.file_path}")
+    fancy_printer.line()
+    fancy_printer.norm("Connecting to OPC-N3")
 
     # Initialise the OPC
     time.sleep(2)  # The OPC needs to boot
-    opc = OPC(serial_config, opc_config)
+    opc = OPC(serial_config, opc_settings)
     opc.initConnection()
-    fancy_print("- Connection Made", char=fancy_print_character)
-    fancy_print("", form="LINE", char=fancy_print_character)
+    fancy_printer.norm("- Connection Made")
+    fancy_printer.line()
 
     # Test the connection
-    fancy_print("Testing Connection", char=fancy_print_character)
-    fancy_print("- Disabling Fan", char=fancy_print_character)
-    opc.fanPower(False)
-    fancy_print("- Enabling Fan", char=fancy_print_character)
-    opc.fanPower(True)
-    fancy_print("- Disabling Laser", char=fancy_print_character)
-    opc.laserPower(False)
-    fancy_print("- Enabling Laser", char=fancy_print_character)
-    opc.laserPower(True)
-    fancy_print("", form="LINE", char=fancy_print_character)
+    fancy_printer.norm("Testing Connection")
+    try:
+        fancy_printer.norm("- Disabling Fan")
+        opc.fanPower(False)
+        fancy_printer.norm("- Enabling Fan")
+        opc.fanPower(True)
+        fancy_printer.norm("- Disabling Laser")
+        opc.laserPower(False)
+        fancy_printer.norm("- Enabling Laser")
+        opc.laserPower(True)
+    except OPCTimeoutError as error:
+        fancy_printer.norm(f"- {error}")
+        fancy_printer.norm("- Check the OPC-N3 is connected and restart")
+        fancy_printer.line()
+        sys.exit(1)
+    fancy_printer.line()
 
     # Record data
-    fancy_print(f"Recording measurements", char=fancy_print_character)
-    fancy_print(
-        f"- Exit via CTRL-C or by closing the terminal",
-        char=fancy_print_character,
-    )
-    fancy_print(
-        f'-- Do not exit if "Storing Data" is displayed',
-        char=fancy_print_character,
-    )
-    fancy_print(
-        f"-- This could corrupt the file being written to",
-        char=fancy_print_character,
-    )
-    fancy_print("", form="LINE", char=fancy_print_character)
+    fancy_printer.norm(f"Recording measurements")
+    fancy_printer.norm(f"- Exit via CTRL-C or by closing the terminal")
+    fancy_printer.norm(f"-- CTRL-C waits for the measurement to be stored")
+    fancy_printer.norm(f'-- Do not close if "Storing Data" is displayed')
+    fancy_printer.norm(f"-- This could corrupt the file being written to")
+    fancy_printer.line()
+    csv_sink = CsvSink(opc_config.file_path)
+    atexit.register(csv_sink.close)
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
     n_measurement_time = first_measurement_time(
-        time_difference, dt.datetime.now()
+        opc_config.measurement_time, dt.datetime.now()
     )
-    fancy_print(
-        f'Current time is {dt.datetime.now().strftime("%H:%M:%S")}',
-        char=fancy_print_character,
+    fancy_printer.norm(
+        f'Current time is {dt.datetime.now().strftime("%H:%M:%S")}'
     )
-    fancy_print(
+    fancy_printer.norm(
         f"- Next measurement will be at "
-        f'{n_measurement_time.strftime("%H:%M:%S")}',
-        char=fancy_print_character,
+        f'{n_measurement_time.strftime("%H:%M:%S")}'
     )
-    fancy_print("", form="LINE", char=fancy_print_character)
+    fancy_printer.line()
     print()
-    time.sleep((n_measurement_time - dt.datetime.now()).seconds + 1)
-    # 1 second added on otherwise it would start on the 59th second of
-    # the previous minute, the joys of timedelta calculations
-    while True:
+    # The measuring and storing status lines are only useful on a
+    # terminal. When logging to a file, each measurement gets one line
+    is_tty = sys.stdout.isatty()
+    status_end = "\r" if is_tty else "\n"
+    stopped = _wait_until(n_measurement_time)
+    while not stopped:
         start_time = dt.datetime.now()
-        print("Measuring data".ljust(70), end="\r", flush=True)
+        if is_tty:
+            _stdout_write(_STATUS_MEASURING)
+            _stdout_flush()
         opc.getData()
-        print("Storing Data".ljust(70), end="\r", flush=True)
-        save_to_file(
-            opc.formatData(), dt.datetime.now(), opc_config["File Path"]
+        if is_tty:
+            _stdout_write(_STATUS_STORING)
+            _stdout_flush()
+        csv_sink.write(opc.formatData(), start_time)
+        n_measurement_time = next_measurement_time(
+            opc_config.measurement_time, start_time
         )
-        n_measurement_time = next_measurement_time(time_difference, start_time)
-        print(
+        end_time = dt.datetime.now()
+        if n_measurement_time <= end_time:
+            # The measurement overran the interval, skip the missed
+            # measurements rather than making them late, back to back
+            n_measurement_time = first_measurement_time(
+                opc_config.measurement_time, end_time
+            )
+        _stdout_write(
             f"{opc.printOutput()} | Next Measurement: "
-            f'{n_measurement_time.strftime("%H:%M:%S")}'.ljust(70),
-            end="\r",
-            flush=True,
-        )
-        time_to_next_measurement = n_measurement_time - dt.datetime.now()
-        time.sleep(
-            (time_to_next_measurement.microseconds) * 1e-6
-            + time_to_next_measurement.seconds
+            f'{n_measurement_time.time().isoformat("seconds")}'.ljust(70)
+            + status_end
         )
+        # On a terminal the line ends with a carriage return so isn't
+        # flushed by line buffering, it would only show once the next
+        # measurement started without this
+        _stdout_flush()
+        stopped = _wait_until(n_measurement_time)
+    csv_sink.close()
+    print()
+    fancy_printer.norm("Measurements stopped")
+
 
-        # 1 second added on otherwise it would start on the 59th second of
-        # the previous minute, the joys of timedelta calculations
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,51 @@ This module contains classes and functions used to communicate with an
 Alphasense OPC-N3 via USB-SPI connection, modify peripheral functions,
 record data and format it so it can be saved to a csv file
 
+    Parameters:
+        _INIT_COMMANDS (tuple): Commands sent to the USB adapter to
+                                initialise the connection, each paired
+                                with the number of bytes it replies
+                                with
+
+        _CMD_PERIPHERAL (bytes): Asks the OPC if it is ready to receive
+                                 a peripheral (fan/laser) command
+
+        _CMD_FAN_ON, _CMD_FAN_OFF (bytes): Turn the fan on or off
+
+        _CMD_LASER_ON, _CMD_LASER_OFF (bytes): Turn the laser on or off
+
+        _CMD_HIST (bytes): Asks the OPC if it is ready to send
+                           histogram data
+
+        _OK_ACK (frozenset): Responses from the OPC indicating it is
+                             ready to receive a command
+
+        _HIST_CLOCK (bytes): The 86 'any value' bytes sent to the OPC
+                             in exchange for histogram data, each
+                             prefixed with the OPC address
+
+        _HIST_STRUCT (Struct): Decodes the bin counts and measurements
+                               from the histogram data in one call
+
+        _RAW_FULL_SCALE (int): Full scale of the raw T and RH readings,
+                               used by convert_T and convert_RH
+
+        _BIN_KEYS (tuple): Names of the 24 particle size bins, "Bin 1"
+                           to "Bin 24"
+
+        _BIN_HEADERS (str): _BIN_KEYS joined in to the bin headers used
+                            by formatData
+
+        _PRINT_TEMPLATE (str): Format string for the PM summary
+                               returned by printOutput
+
+        _PRINT_NO_DATA (str): Returned by printOutput when there is no
+                              data
+
     Classes:
+        OPCTimeoutError: Raised when the OPC-N3 doesn't become ready to
+                         receive a command
+
         SPIBytes: Dataclass containing bytecodes that command the OPC
                   to perform various functions
 
@@ -38,12 +82,22 @@ __email__ = "CaderIdrisGH@outlook.com"
 __status__ = "Stable Release"
 
 from dataclasses import dataclass
-from struct import unpack
+from struct import Struct
 import time
 
 import serial
 
 
+class OPCTimeoutError(Exception):
+    """Raised when the OPC-N3 doesn't become ready to receive a command
+
+    The SPI buffer is reset after every 20 unanswered polls. If the OPC
+    still isn't ready after OPCN3.readyTimeout seconds, it is assumed
+    to be disconnected or stuck and this is raised rather than polling
+    it forever.
+    """
+
+
 @dataclass
 class SPIBytes:
     """Dataclass containing bytecodes that command the OPC to perform
@@ -94,13 +148,59 @@ class SPIBytes:
     laserChannel: int = 0x01
 
 
+# Commands written to the USB adapter and OPC, built once as they are
+# resent every time the OPC is polled
+_INIT_COMMANDS = (
+    (bytes([SPIBytes.adUSBAdapter, 0x01]), 3),
+    (bytes([SPIBytes.adUSBAdapter, 0x03]), 9),
+    (bytes([SPIBytes.adUSBAdapter, 0x02, 0x92, 0x07]), 2),
+)
+_CMD_PERIPHERAL = bytes([SPIBytes.adOPC, SPIBytes.pCommand])
+_CMD_FAN_ON = bytes([SPIBytes.adOPC, SPIBytes.fanOn])
+_CMD_FAN_OFF = bytes([SPIBytes.adOPC, SPIBytes.fanOff])
+_CMD_LASER_ON = bytes([SPIBytes.adOPC, SPIBytes.laserOn])
+_CMD_LASER_OFF = bytes([SPIBytes.adOPC, SPIBytes.laserOff])
+_CMD_HIST = bytes([SPIBytes.adOPC, SPIBytes.reqHist])
+
+# Bytes returned by the OPC when it is ready to receive a command
+_OK_ACK = frozenset((b"\xff\xf3", b"\xf3\xff"))
+
+# The 86 'any value' bytes exchanged for histogram data, sent to the
+# USB adapter in one write
+_HIST_CLOCK = bytes([SPIBytes.adOPC, 0x45]) * 86
+
+# Layout of the first 72 bytes of histogram data: 24 bin counts, MToF,
+# sampling period, flow rate, raw T, raw RH, PM1, PM2.5 and PM10
+_HIST_STRUCT = Struct("<24Hf4H3f")
+
+# Full scale of the raw 16 bit T and RH readings
+_RAW_FULL_SCALE = (2 ** 16) - 1
+
+# Keys of the bin counts in the "Bin Data" dict, which are also the
+# bin headers in the csv file
+_BIN_KEYS = tuple(f"Bin {binNumber}" for binNumber in range(1, 25))
+_BIN_HEADERS = ", ".join(_BIN_KEYS)
+
+# Console summary returned by printOutput. Each value is converted with
+# str and left justified in 7 characters
+_PRINT_TEMPLATE = "PM1: {!s:<7}| PM2.5: {!s:<7}| PM10: {!s:<7}"
+_PRINT_NO_DATA = "#" * 38
+
+
 class OPCN3:
     """Represents an OPC-N3 connected via USB-SPI
 
     Attributes:
         opc (serial object): The serial connection to the OPC-N3
 
-        wait (float): The standard time to wait between messages
+        busyWait (float): The time to wait before asking the OPC-N3
+                          again if it is ready to receive a command.
+                          Supplemental SPI information asks for at
+                          least 10ms
+
+        readyTimeout (float): Seconds fanPower and laserPower wait for
+                              the OPC-N3 to become ready before raising
+                              OPCTimeoutError
 
         isFanOn (boolean): True if fan should be on, false if not
 
@@ -109,6 +209,9 @@ class OPCN3:
         config (dict): User generated config file indicating operating
                        parameters of the instrument
 
+        _useBinData (boolean): "Use Bin Data" from config, looked up
+                               once when the class is initialised
+
         latestData (dict): Data output by OPC-N3, parsed by script.
                            Defaults to None if OPC does not send
                            data or data is not in expected format
@@ -122,7 +225,8 @@ class OPCN3:
 
         getData: Requests histogram data from the OPC-N3 which also
                  resets the histogram after data is returned. The
-                 data is then parsed and saved to latestData
+                 data is then parsed, saved to latestData and
+                 returned
 
         formatData: Formats data saved to latestData instance in to a
                     format suitable for writing to a csv file
@@ -147,10 +251,19 @@ class OPCN3:
         https://github.com/JarvisSan22/OPC-N3_python
         """
         self.opc = serial.Serial(**serialConfig)
-        self.wait = 1e-06
+        try:
+            # Shortens the turn around of each poll on adapters that
+            # buffer received bytes, such as FTDI bridges. Not all
+            # drivers support it, so it is only attempted
+            self.opc.set_low_latency_mode(True)
+        except (NotImplementedError, ValueError):
+            pass
+        self.busyWait = 0.01
+        self.readyTimeout = 30
         self.isFanOn = True
         self.isLaserOn = True
         self.config = deviceConfig
+        self._useBinData = bool(deviceConfig["Use Bin Data"])
         self.latestData = None
 
     def initConnection(self):
@@ -165,15 +278,9 @@ class OPCN3:
         https://github.com/JarvisSan22/OPC-N3_python
         """
         time.sleep(1)
-        self.opc.write(bytearray([SPIBytes.adUSBAdapter, 0x01]))
-        self.opc.read(3)
-        time.sleep(self.wait)
-        self.opc.write(bytearray([SPIBytes.adUSBAdapter, 0x03]))
-        self.opc.read(9)
-        time.sleep(self.wait)
-        self.opc.write(bytearray([SPIBytes.adUSBAdapter, 0x02, 0x92, 0x07]))
-        self.opc.read(2)
-        time.sleep(self.wait)
+        for initCommand, replyLength in _INIT_COMMANDS:
+            self.opc.write(initCommand)
+            self.opc.read(replyLength)
 
     def fanPower(self, status):
         """Toggles OPC-N3 fan power status
@@ -187,10 +294,14 @@ class OPCN3:
                              > 20, the SPI buffer is reset and
                              loopCount is reset to 0
 
-            fanStatus (int): The byte sent to the OPC to change
-                             the power status of the fan.
-                             fanOn is used to turn it on.
-                             fanOff is used to turn it off.
+            deadline (float): time.monotonic() value after which
+                              OPCTimeoutError is raised if the OPC
+                              still isn't ready
+
+            fanStatus (bytes): The command sent to the OPC to
+                               change the power status of the fan.
+                               _CMD_FAN_ON is used to turn it on.
+                               _CMD_FAN_OFF is used to turn it off.
 
             opcReturn (int): Bytes returned by OPC to indicate
                              whether it's ready to receive
@@ -199,33 +310,39 @@ class OPCN3:
         Returns:
             Nothing, toggles the fan
 
+        Raises:
+            OPCTimeoutError: The OPC-N3 did not become ready for the
+                             command within readyTimeout seconds
+
         Adapted from Python2 code written by Daniel Jarvis and
         licensed under GPL v3.0:
         https://github.com/JarvisSan22/OPC-N3_python
         """
         loopCount = 0
+        deadline = time.monotonic() + self.readyTimeout
         if status:  # True if fan is on, false if not
-            fanStatus = SPIBytes.fanOn
+            fanStatus = _CMD_FAN_ON
         else:
-            fanStatus = SPIBytes.fanOff
+            fanStatus = _CMD_FAN_OFF
         while True:
             loopCount += 1
-            self.opc.write(
-                bytearray([SPIBytes.adOPC, SPIBytes.pCommand])
-            )  # 0x03 is command byte
+            self.opc.write(_CMD_PERIPHERAL)
             opcReturn = self.opc.read(2)
-            if opcReturn == (b"\xff\xf3" or b"xf3\xff"):
-                time.sleep(self.wait)
-                self.opc.write(bytearray([SPIBytes.adOPC, fanStatus]))
+            if opcReturn in _OK_ACK:
+                self.opc.write(fanStatus)
                 self.opc.read(2)
                 time.sleep(2)
                 self.isFanOn = status
                 break
+            elif time.monotonic() > deadline:
+                raise OPCTimeoutError(
+                    "OPC-N3 did not become ready for the fan command"
+                )
             elif loopCount > 20:
                 time.sleep(3)
                 loopCount = 0
             else:
-                time.sleep(self.wait * 10)
+                time.sleep(self.busyWait)
 
     def laserPower(self, status):
         """Toggles OPC-N3 laser power status
@@ -239,10 +356,15 @@ class OPCN3:
                              > 20, the SPI buffer is reset and
                              loopCount is reset to 0
 
-            laserStatus (int): The byte sent to the OPC to change
-                               the power status of the laser.
-                               laserOn is used to turn it on.
-                               laserOff is used to turn it off.
+            deadline (float): time.monotonic() value after which
+                              OPCTimeoutError is raised if the OPC
+                              still isn't ready
+
+            laserStatus (bytes): The command sent to the OPC to
+                                 change the power status of the
+                                 laser. _CMD_LASER_ON is used to turn
+                                 it on. _CMD_LASER_OFF is used to turn
+                                 it off.
 
             opcReturn (int): Bytes returned by OPC to indicate
                              whether it's ready to receive
@@ -251,33 +373,39 @@ class OPCN3:
         Returns:
             Nothing, toggles the laser
 
+        Raises:
+            OPCTimeoutError: The OPC-N3 did not become ready for the
+                             command within readyTimeout seconds
+
         Adapted from Python2 code written by Daniel Jarvis and
         licensed under GPL v3.0:
         https://github.com/JarvisSan22/OPC-N3_python
         """
         loopCount = 0
+        deadline = time.monotonic() + self.readyTimeout
         if status:  # True if fan is on, false if not
-            laserStatus = SPIBytes.laserOn
+            laserStatus = _CMD_LASER_ON
         else:
-            laserStatus = SPIBytes.laserOff
+            laserStatus = _CMD_LASER_OFF
         while True:
             loopCount += 1
-            self.opc.write(
-                bytearray([SPIBytes.adOPC, SPIBytes.pCommand])
-            )  # 0x03 is command byte
+            self.opc.write(_CMD_PERIPHERAL)
             opcReturn = self.opc.read(2)
-            if opcReturn == (b"\xff\xf3" or b"\xf3\xff"):
-                time.sleep(self.wait)
-                self.opc.write(bytearray([SPIBytes.adOPC, laserStatus]))
+            if opcReturn in _OK_ACK:
+                self.opc.write(laserStatus)
                 self.opc.read(2)
                 time.sleep(2)
                 self.isLaserOn = status
                 break
+            elif time.monotonic() > deadline:
+                raise OPCTimeoutError(
+                    "OPC-N3 did not become ready for the laser command"
+                )
             elif loopCount > 20:
                 time.sleep(3)
                 loopCount = 0
             else:
-                time.sleep(self.wait * 10)
+                time.sleep(self.busyWait)
 
     def getData(self):
         """Requests histogram data from OPC-N3 and parses it
@@ -291,18 +419,20 @@ class OPCN3:
                              whether it's ready to receive
                              peripheral command or not
 
-            opcHistBytesRaw (bytearray): Raw output of OPC-N3 when
-                                         asked for data. The
-                                         histogram data comprises
-                                         of 86 bytes but 0x61 is
-                                         also returned when each
-                                         'any value' byte is sent
-                                         so the byte array is 86*2
-                                         bytes long
+            opcHistBytesRaw (bytes): Raw output of OPC-N3 when
+                                     asked for data. The histogram
+                                     data comprises of 86 bytes but
+                                     0x61 is also returned when each
+                                     'any value' byte is sent so the
+                                     byte array is 86*2 bytes long
 
-            opcHistBytes (list): opcHistBytesRaw with all useless
-                                 0x61 values removes (all odd
-                                 values removed)
+            opcHistBytes (bytes): opcHistBytesRaw with all useless
+                                  0x61 values removes (all odd values
+                                  removed)
+
+            binCounts (list): Counts for the 24 particle size bins,
+                              decoded from opcHistBytes along with
+                              the other measurements
 
             opcHistData (dict): Parsed data output by OPC-N3.
                                 Contains optional "Bin Data"
@@ -311,8 +441,8 @@ class OPCN3:
                                 requested in the instrument config
 
         Returns:
-            Nothing, stores data in latestData attribute if
-            successful, stores None in latestData if not
+            opcHistData if successful, None if not. The returned
+            value is also stored in the latestData attribute
 
         Adapted from Python2 code written by Daniel Jarvis and
         licensed under GPL v3.0:
@@ -322,82 +452,59 @@ class OPCN3:
         loopCount = 0
         while True:
             loopCount += 1
-            self.opc.write(bytearray([SPIBytes.adOPC, SPIBytes.reqHist]))
+            self.opc.write(_CMD_HIST)
             opcReturn = self.opc.read(2)
-            if opcReturn == (b"\xff\xf3" or b"\xf3\xff"):
+            if opcReturn in _OK_ACK:
                 # The OPC needs to return 86 bytes which it does in
                 # exchange for 86 bytes of 'any value' (as stated in
                 # supplemental SPI information). They then need to
                 # be read from the SPI buffer
-                for histByte in range(0, 86):
-                    self.opc.write(bytearray([SPIBytes.adOPC, 0x45]))
-                    time.sleep(self.wait)
-                opcHistBytesRaw = bytearray(self.opc.read(size=172))
+                self.opc.write(_HIST_CLOCK)
+                opcHistBytesRaw = self.opc.read(size=172)
                 # 86 bytes are expected. However, as the OPC also
                 # returns xff when it receives the 'any value' byte,
-                # the program reads 2 * 86 bytes
-                opcHistBytes = [
-                    histByte
-                    for index, histByte in enumerate(opcHistBytesRaw)
-                    if ((index + 1) % 2 == 0)
-                ]
-                if len(opcHistBytes) == 86:
+                # the program reads 2 * 86 bytes. A short read is
+                # rejected before the bytes are stripped
+                if len(opcHistBytesRaw) == 172:
+                    opcHistBytes = opcHistBytesRaw[1::2]
+                    (
+                        *binCounts,
+                        mToF,
+                        period,
+                        flowrate,
+                        rawT,
+                        rawRH,
+                        pm1,
+                        pm25,
+                        pm10,
+                    ) = _HIST_STRUCT.unpack_from(opcHistBytes)
                     opcHistData = {
-                        "MToF (us)": round(
-                            unpack("f", bytes(opcHistBytes[48:52]))[0] / 3, 3
-                        ),
-                        "Period (s)": combine_bytes(
-                            opcHistBytes[52], opcHistBytes[53]
-                        )
-                        / 100,
-                        "Flowrate (ml/s)": combine_bytes(
-                            opcHistBytes[54], opcHistBytes[55]
-                        )
-                        / 100,
+                        "MToF (us)": round(mToF / 3, 3),
+                        "Period (s)": period / 100,
+                        "Flowrate (ml/s)": flowrate / 100,
+                        # convert_T and convert_RH, inlined
                         "Temp (C)": round(
-                            convert_T(
-                                combine_bytes(
-                                    opcHistBytes[56], opcHistBytes[57]
-                                )
-                            ),
-                            3,
-                        ),
-                        "RH (%)": round(
-                            convert_RH(
-                                combine_bytes(
-                                    opcHistBytes[58], opcHistBytes[59]
-                                )
-                            ),
-                            3,
-                        ),
-                        "PM1 (ug/m-3)": round(
-                            unpack("f", bytes(opcHistBytes[60:64]))[0], 3
-                        ),
-                        "PM2.5 (ug/m-3)": round(
-                            unpack("f", bytes(opcHistBytes[64:68]))[0], 3
-                        ),
-                        "PM10 (ug/m-3)": round(
-                            unpack("f", bytes(opcHistBytes[68:72]))[0], 3
+                            -45 + (175 * (rawT / _RAW_FULL_SCALE)), 3
                         ),
+                        "RH (%)": round(100 * (rawRH / _RAW_FULL_SCALE), 3),
+                        "PM1 (ug/m-3)": round(pm1, 3),
+                        "PM2.5 (ug/m-3)": round(pm25, 3),
+                        "PM10 (ug/m-3)": round(pm10, 3),
                     }
-                    if self.config["Use Bin Data"]:
-                        opcHistData["Bin Data"] = dict()
-                        for binNumber in range(0, 24):
-                            opcHistData["Bin Data"][
-                                f"Bin {binNumber + 1}"
-                            ] = combine_bytes(
-                                opcHistBytes[(binNumber * 2)],
-                                opcHistBytes[(binNumber * 2) + 1],
-                            )
+                    if self._useBinData:
+                        opcHistData["Bin Data"] = dict(
+                            zip(_BIN_KEYS, binCounts)
+                        )
                     self.latestData = opcHistData
-                    break
-                elif loopCount > 20:
-                    time.sleep(3)  # Reset the SPI buffer
-                    self.initConnection()  # Reinitialise connection
-                    self.latestData = None
-                    break
-                else:
-                    time.sleep(self.wait * 10)
+                    return opcHistData
+            # Polls the OPC didn't answer count towards the reset too,
+            # otherwise a busy OPC would be polled forever
+            if loopCount > 20:
+                time.sleep(3)  # Reset the SPI buffer
+                self.initConnection()  # Reinitialise connection
+                self.latestData = None
+                return None
+            time.sleep(self.busyWait)
 
     def formatData(self):
         """Formats data saved to latestData instance in to a format
@@ -410,16 +517,15 @@ class OPCN3:
         saves as None values.
 
             Parameters:
-                binKeys (list): Keys representing the different
-                                particle size bins
+                dataKeys (list): Keys of latestData for all
+                                 measurements other than the bin data
 
                 binHeaders (str): Headers for the bin data, suitable
-                                  for a csv file
+                                  for a csv file. None if bin data
+                                  isn't used
 
-                binFormatted (str): Bin data, suitable for a csv file
-
-                dataKeys (list): Keys representing all other
-                                 measurements made by OPC
+                binFormatted (str): Bin data, suitable for a csv file.
+                                    None if bin data isn't used
 
                 dataHeaders (str): Headers for other measurements,
                                    suitable for a csv file
@@ -445,46 +551,27 @@ class OPCN3:
                 "Bin Headers": None,
                 "Bin Data": None,
             }
-        if self.config["Use Bin Data"]:
-            binKeys = list(self.latestData["Bin Data"].keys())
-            binHeaders = ""
-            binFormatted = ""
-            for bIndex, binKey in enumerate(binKeys):
-                if bIndex == 0:
-                    binHeaders = f"{binKey}"  # f string to avoid
-                    # unforseen behaviour
-                    binFormatted = f"{self.latestData['Bin Data'][binKey]}"
-                else:
-                    binHeaders = f"{binHeaders}, {binKey}"
-                    binFormatted = (
-                        f"{binFormatted},"
-                        f"{self.latestData['Bin Data'][binKey]}"
-                    )
-            self.latestData.pop("Bin Data", None)
-        dataKeys = list(self.latestData.keys())
-        dataHeaders = ""
-        dataFormatted = ""
-        for dataIndex, dataKey in enumerate(dataKeys):
-            if dataIndex == 0:
-                dataHeaders = f"{dataKey}"
-                dataFormatted = f"{self.latestData[dataKey]}"
-            else:
-                dataHeaders = f"{dataHeaders}, {dataKey}"
-                dataFormatted = f"{dataFormatted}, {self.latestData[dataKey]}"
-        if self.config["Use Bin Data"]:
-            return {
-                "Headers": dataHeaders,
-                "Data": dataFormatted,
-                "Bin Headers": binHeaders,
-                "Bin Data": binFormatted,
-            }
+        # latestData is left as it is, so formatData can be called more
+        # than once for the same measurement
+        dataKeys = [key for key in self.latestData if key != "Bin Data"]
+        dataHeaders = ", ".join(dataKeys)
+        dataFormatted = ", ".join(
+            str(self.latestData[dataKey]) for dataKey in dataKeys
+        )
+        if self._useBinData:
+            binHeaders = _BIN_HEADERS
+            binFormatted = ",".join(
+                map(str, self.latestData["Bin Data"].values())
+            )
         else:
-            return {
-                "Headers": dataHeaders,
-                "Data": dataFormatted,
-                "Bin Headers": None,
-                "Bin Data": None,
-            }
+            binHeaders = None
+            binFormatted = None
+        return {
+            "Headers": dataHeaders,
+            "Data": dataFormatted,
+            "Bin Headers": binHeaders,
+            "Bin Data": binFormatted,
+        }
 
     def printOutput(self):
         """Returns data stored in latestData in a format to be printed
@@ -499,13 +586,13 @@ class OPCN3:
             instead
         """
         if self.latestData is not None:
-            return (
-                f"PM1: {str(self.latestData['PM1 (ug/m-3)']).ljust(7)}| "
-                f"PM2.5: {str(self.latestData['PM2.5 (ug/m-3)']).ljust(7)}| "
-                f"PM10: {str(self.latestData['PM10 (ug/m-3)']).ljust(7)}"
+            return _PRINT_TEMPLATE.format(
+                self.latestData["PM1 (ug/m-3)"],
+                self.latestData["PM2.5 (ug/m-3)"],
+                self.latestData["PM10 (ug/m-3)"],
             )
         else:
-            return "#" * 38
+            return _PRINT_NO_DATA
 
 
 def convert_RH(rawRH):
@@ -524,7 +611,7 @@ def convert_RH(rawRH):
     licensed under GPL v3.0:
     https://github.com/JarvisSan22/OPC-N3_python
     """
-    return 100 * (rawRH / ((2 ** 16) - 1))
+    return 100 * (rawRH / _RAW_FULL_SCALE)
 
 
 def convert_T(rawT):
@@ -543,7 +630,7 @@ def convert_T(rawT):
     licensed under GPL v3.0:
     https://github.com/JarvisSan22/OPC-N3_python
     """
-    return -45 + (175 * (rawT / ((2 ** 16) - 1)))
+    return -45 + (175 * (rawT / _RAW_FULL_SCALE))
 
 
 def combine_bytes(LSB, MSB):
@@ -8,3 +8,4 @@ python3 -m venv "OPCN3"
 source "OPCN3/bin/activate"
 pip install -U setuptools pip
 pip install pyserial
+python3 -m compileall -q peripherals  # Cache bytecode before the first run
@@ -0,0 +1,78 @@
+""" Regression tests for CsvSink in main.py
+
+Run from the repository root with:
+    python3 -m unittest discover tests
+"""
+
+import datetime as dt
+import os
+import tempfile
+import unittest
+
+from main import CsvSink, _BIN_NONES
+
+_GOOD = {
+    "Headers": "PM1 (ug/m-3), PM2.5 (ug/m-3)",
+    "Data": "1.25, 2.5",
+    "Bin Headers": "Bin 1, Bin 2",
+    "Bin Data": "3,4",
+}
+
+_FAILED = {
+    "Headers": None,
+    "Data": None,
+    "Bin Headers": None,
+    "Bin Data": None,
+}
+
+
+class CsvSinkFailedReadTest(unittest.TestCase):
+    """A failed read after the file exists is logged as a None row"""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.filePath = f"{self.dir.name}/"
+        self.sink = CsvSink(self.filePath)
+
+    def tearDown(self):
+        self.sink.close()
+        self.dir.cleanup()
+
+    def read_lines(self, date):
+        self.sink.close()
+        with open(f"{self.filePath}{date.isoformat()}.csv") as csvFile:
+            return csvFile.read().splitlines()
+
+    def test_failed_read_with_bins(self):
+        start = dt.datetime(2021, 1, 1, 12, 0)
+        self.sink.write(_GOOD, start)
+        self.sink.write(_FAILED, start + dt.timedelta(minutes=1))
+        self.assertEqual(
+            self.read_lines(start.date()),
+            [
+                "Timestamp, PM1 (ug/m-3), PM2.5 (ug/m-3), Bin 1, Bin 2",
+                "2021-01-01 12:00:00, 1.25, 2.5, 3,4",
+                f"2021-01-01 12:01:00, None, {_BIN_NONES}",
+            ],
+        )
+
+    def test_failed_read_without_bins(self):
+        start = dt.datetime(2021, 1, 1, 12, 0)
+        noBins = dict(_GOOD, **{"Bin Headers": None, "Bin Data": None})
+        self.sink.write(noBins, start)
+        self.sink.write(_FAILED, start + dt.timedelta(minutes=1))
+        self.assertEqual(
+            self.read_lines(start.date())[1:],
+            ["2021-01-01 12:00:00, 1.25, 2.5", "2021-01-01 12:01:00, None"],
+        )
+
+    def test_failed_first_read_creates_no_file(self):
+        start = dt.datetime(2021, 1, 1, 12, 0)
+        self.sink.write(_FAILED, start)
+        self.assertFalse(
+            os.path.exists(f"{self.filePath}{start.date().isoformat()}.csv")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
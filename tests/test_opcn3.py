@@ -0,0 +1,85 @@
+""" Regression tests for reading a busy OPC-N3 in peripherals/OPCN3.py
+
+Run from the repository root with:
+    python3 -m unittest discover tests
+"""
+
+import datetime as dt
+import tempfile
+import unittest
+from unittest import mock
+
+from main import CsvSink, _BIN_NONES
+from peripherals.OPCN3 import OPCN3, _HIST_STRUCT, _RAW_FULL_SCALE
+
+
+class FakePort:
+    """Stands in for the serial connection to the USB adapter
+
+    Answers the first 'busy' ready polls with 0x31 (busy), then
+    answers as ready and returns a fixed histogram.
+    """
+
+    def __init__(self, busy=0):
+        self.busy = busy
+        payload = _HIST_STRUCT.pack(
+            *range(24), 3.0, 250, 550, 0, _RAW_FULL_SCALE, 1.0, 2.0, 3.0
+        ) + bytes(14)
+        self.hist = bytes(
+            byte for dataByte in payload for byte in (0xFF, dataByte)
+        )
+
+    def write(self, data):
+        return len(data)
+
+    def read(self, size=1):
+        if size == 2:
+            if self.busy > 0:
+                self.busy -= 1
+                return b"\x31\x31"
+            return b"\xff\xf3"
+        if size == 172:
+            return self.hist
+        return bytes(size)
+
+
+def make_opc(busy):
+    opc = OPCN3.__new__(OPCN3)
+    opc.opc = FakePort(busy)
+    opc.busyWait = 0
+    opc.config = {"Use Bin Data": True}
+    opc._useBinData = True
+    opc.latestData = None
+    return opc
+
+
+@mock.patch("peripherals.OPCN3.time.sleep")
+class BusyOpcTest(unittest.TestCase):
+    """A busy OPC gives a None measurement and logging carries on"""
+
+    def test_busy_opc_returns_none(self, sleep):
+        opc = make_opc(busy=21)
+        self.assertIsNone(opc.getData())
+        self.assertIsNone(opc.latestData)
+
+    def test_logging_continues_after_busy_read(self, sleep):
+        opc = make_opc(busy=0)
+        with tempfile.TemporaryDirectory() as dataDir:
+            sink = CsvSink(f"{dataDir}/")
+            start = dt.datetime(2021, 1, 1, 12, 0)
+            for minute, busy in enumerate((0, 21, 0)):
+                opc.opc.busy = busy
+                opc.getData()
+                sink.write(
+                    opc.formatData(), start + dt.timedelta(minutes=minute)
+                )
+            sink.close()
+            with open(f"{dataDir}/2021-01-01.csv") as csvFile:
+                lines = csvFile.read().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[2], f"2021-01-01 12:01:00, None, {_BIN_NONES}")
+        self.assertTrue(lines[3].startswith("2021-01-01 12:02:00, 1.0, "))
+
+
+if __name__ == "__main__":
+    unittest.main()